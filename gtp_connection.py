@@ -13,13 +13,29 @@ from board_util import GoBoardUtil, BLACK, WHITE, EMPTY, BORDER, PASS, \
     MAXSIZE, coord_to_point, is_black_white
 import numpy as np
 
+# Leading command ids used by regression test files, e.g. "10 genmove b"
+_LEADING_DIGITS = re.compile(r"^\d+")
+
+# Lookup table from point color to its gogui-rules_board character
+_BOARD_CHARS = np.full(256, ord('?'), dtype = np.uint8)
+_BOARD_CHARS[BLACK] = ord('X')
+_BOARD_CHARS[WHITE] = ord('O')
+_BOARD_CHARS[EMPTY] = ord('.')
+
+# GTP column letters (no 'i') indexed by col - 1, and the reverse mapping
+_COLUMN_LETTERS = "abcdefghjklmnopqrstuvwxyz"
+_COL_FROM_LETTER = {c: i + 1 for i, c in enumerate(_COLUMN_LETTERS)}
+# Same letters as an array, for formatting many points at once
+_COLUMN_LETTER_ARRAY = np.array(list(_COLUMN_LETTERS))
+
+# Integer codes for the color names used by GTP commands
+_COLOR_TO_INT = {"b": BLACK , "w": WHITE, "e": EMPTY, "BORDER": BORDER}
+
 class GtpConnection():
 
     def __init__(self, go_engine, board, debug_mode = False):
         self.blackMax = None
         self.whiteMax = None
-        self.dictStoreWhiteMove = None
-        self.dictStoreBlackMove = None
         """
         Manage a GTP connection for a Go-playing engine
 
@@ -56,6 +72,8 @@ class GtpConnection():
             "gogui-rules_final_result": self.gogui_rules_final_result_cmd,
             "gogui-analyze_commands": self.gogui_analyze_cmd
         }
+        # self.commands does not change, so list_commands can reuse this
+        self._commands_str = ' '.join(self.commands)
 
         # used for argument checking
         # values: (required number of arguments, 
@@ -68,6 +86,7 @@ class GtpConnection():
             "play": (2, 'Usage: play {b,w} MOVE'),
             "legal_moves": (1, 'Usage: legal_moves {w,b}')
         }
+        self._reset_lines()
 
     def write(self, data):
         stdout.write(data) 
@@ -79,11 +98,11 @@ class GtpConnection():
         """
         Start a GTP connection. 
         This function continuously monitors standard input for commands.
+        Responses are flushed once per input line rather than per write.
         """
-        line = stdin.readline()
-        while line:
+        for line in stdin:
             self.get_cmd(line)
-            line = stdin.readline()
+            self.flush()
 
     def get_cmd(self, command):
         """
@@ -95,7 +114,7 @@ class GtpConnection():
             return
         # Strip leading numbers from regression tests
         if command[0].isdigit():
-            command = re.sub("^\d+", "", command).lstrip()
+            command = _LEADING_DIGITS.sub("", command).lstrip()
 
         elements = command.split()
         if not elements:
@@ -103,26 +122,27 @@ class GtpConnection():
         command_name = elements[0]; args = elements[1:]
         if self.has_arg_error(command_name, len(args)):
             return
-        if command_name in self.commands:
-            try:
-                self.commands[command_name](args)
-            except Exception as e:
-                self.debug_msg("Error executing command {}\n".format(str(e)))
-                self.debug_msg("Stack Trace:\n{}\n".
-                               format(traceback.format_exc()))
-                raise e
-        else:
+        handler = self.commands.get(command_name)
+        if handler is None:
             self.debug_msg("Unknown command: {}\n".format(command_name))
             self.error('Unknown command')
-            stdout.flush()
+            return
+        try:
+            handler(args)
+        except Exception as e:
+            self.debug_msg("Error executing command {}\n".format(str(e)))
+            self.debug_msg("Stack Trace:\n{}\n".
+                           format(traceback.format_exc()))
+            raise e
 
     def has_arg_error(self, cmd, argnum):
         """
         Verify the number of arguments of cmd.
         argnum is the number of parsed arguments
         """
-        if cmd in self.argmap and self.argmap[cmd][0] != argnum:
-            self.error(self.argmap[cmd][1])
+        spec = self.argmap.get(cmd)
+        if spec is not None and spec[0] != argnum:
+            self.error(spec[1])
             return True
         return False
 
@@ -130,23 +150,30 @@ class GtpConnection():
         """ Write msg to the debug stream """
         if self._debug_mode:
             stderr.write(msg)
-            stderr.flush()
 
     def error(self, error_msg):
         """ Send error msg to stdout """
         stdout.write('? {}\n\n'.format(error_msg))
-        stdout.flush()
 
     def respond(self, response=''):
         """ Send response to stdout """
         stdout.write('= {}\n\n'.format(response))
-        stdout.flush()
 
     def reset(self, size):
         """
         Reset the board to empty board of given size
         """
         self.board.reset(size)
+        self._reset_lines()
+
+    def _reset_lines(self):
+        """
+        Clear the line lengths and win state, sized for the current board
+        """
+        self.lineLength = np.zeros((2, self.board.maxpoint, 4),
+                                   dtype = np.int16)
+        self.colorMax = {'b': 0,'w': 0}
+        self.game_over = False
 
     def board2d(self):
         return str(GoBoardUtil.get_twoD_board(self.board))
@@ -158,6 +185,7 @@ class GtpConnection():
     def quit_cmd(self, args):
         """ Quit game and exit the GTP interface """
         self.respond()
+        self.flush()
         exit()
 
     def name_cmd(self, args):
@@ -171,9 +199,6 @@ class GtpConnection():
     def clear_board_cmd(self, args):
         """ clear the board """
         self.reset(self.board.size)
-        self.dictStoreWhiteMove = {}
-        self.dictStoreBlackMove = {}
-        self.colorMax = {'b': 0,'w': 0}
         self.respond()
 
     def boardsize_cmd(self, args):
@@ -216,16 +241,11 @@ class GtpConnection():
         # case 2: when one side is win, no legal moves should return
         # case 3: return all possible legal moves, if either cases NOT happened
         # refer to the Go program
-        if self.colorMax['w'] >= 5 or self.colorMax['b'] >= 5:
+        if self.game_over:
             self.respond()
         else:
             moves = self.board.get_empty_points()
-            gtp_moves = []
-            for move in moves:
-                coords = point_to_coord(move, self.board.size)
-                gtp_moves.append(format_point(coords))
-                # print(format_point(coords))
-            sorted_moves = ' '.join(sorted(gtp_moves))
+            sorted_moves = ' '.join(format_points(moves, self.board.size))
             self.respond(sorted_moves.upper())
 
     def gogui_rules_side_to_move_cmd(self, args):
@@ -235,23 +255,12 @@ class GtpConnection():
 
     def gogui_rules_board_cmd(self, args):
         """ We already implemented this function for Assignment 1 """
-        size = self.board.size
-        str = ''
-        for row in range(size-1, -1, -1):
-            start = self.board.row_start(row + 1)
-            for i in range(size):
-                #str += '.'
-                point = self.board.board[start + i]
-                if point == BLACK:
-                    str += 'X'
-                elif point == WHITE:
-                    str += 'O'
-                elif point == EMPTY:
-                    str += '.'
-                else:
-                    assert False
-            str += '\n'
-        self.respond(str)
+        board2d = GoBoardUtil.get_twoD_board(self.board)[::-1]
+        # one extra column of newlines lets the whole board decode at once
+        chars = np.full((self.board.size, self.board.size + 1), ord('\n'),
+                        dtype = np.uint8)
+        chars[:, :-1] = _BOARD_CHARS[board2d]
+        self.respond(chars.tobytes().decode())
             
     def gogui_rules_final_result_cmd(self, args):
         '''gogui-rules_final_result'''
@@ -292,16 +301,17 @@ class GtpConnection():
                 self.board.current_player = GoBoardUtil.opponent(color)
                 self.respond()
                 return
-            coord = move_to_coord(args[1], self.board.size)
+            board_size = self.board.size
+            coord = move_to_coord(args[1], board_size)
             if coord:
-                move = coord_to_point(coord[0],coord[1], self.board.size)
+                move = coord_to_point(coord[0],coord[1], board_size)
             else:
                 self.error("Error executing move {} converted from {}"
                            .format(move, args[1]))
                 return  #do not exist coord!!!
 
             # one more evaluation, if one side wins, then play should not continue!!!
-            if self.colorMax['w'] >= 5 or self.colorMax['b'] >= 5:
+            if self.game_over:
                 self.respond("One side is win game over!")
                 return
             # Once executed uptill here, it means , all above conditions passed,
@@ -312,10 +322,12 @@ class GtpConnection():
                 return  # repeated play in that coord!!!
             else:
                 #has been successfully executed 'self.board.play_move'
-                self.debug_msg("Move: {}\nBoard:\n{}\n".
-                                format(board_move, self.board2d()))
-                # insert the information into dictionary
-                self.insertKeyIntoDict(args[0],coord,move)
+                # only build the board string when it will be written
+                if self._debug_mode:
+                    self.debug_msg("Move: {}\nBoard:\n{}\n".
+                                    format(board_move, self.board2d()))
+                # update the lines of stones through the new stone
+                self.updateLineLengths(board_color,move)
             self.respond()
         except Exception as e:
             self.respond('Error: {}'.format(str(e)))
@@ -326,7 +338,7 @@ class GtpConnection():
         # ------------------------
         # this function needs some simple modification, such that
         # if one side is win, it will not generate any position to move, but return '[resign]'
-        if self.colorMax['w'] >= 5 or self.colorMax['b'] >= 5:
+        if self.game_over:
             self.respond("resign")
         else:
             board_color = args[0].lower()
@@ -340,141 +352,39 @@ class GtpConnection():
             else:
                 self.respond("Illegal move: {}".format(move_as_string))
 
-    def insertKeyIntoDict(self,color,coord,move):
-        dictPointer = {}
-        if color.lower() == "w":
-
-            dictPointer = self.dictStoreWhiteMove
-        elif color.lower() =="b":
-
-            dictPointer = self.dictStoreBlackMove
-        dictPointer.setdefault(coord,{'upDown':1,'leftRight':1,'backslash':1,"forwardslash":1})
-        for key,value in dictPointer.get(coord).items():
-            if key == 'upDown':
-                upNighbour = (coord[0]-1,coord[1])
-                downNighbour = (coord[0]+1,coord[1])
-                #print(upNighbour,downNighbour)
-                if upNighbour in dictPointer.keys():
-
-                    dictPointer.get(coord)['upDown'] += dictPointer.get(upNighbour)['upDown']   #update the current step
-                    #dictPointer.get(upNighbour)['upDown'] = dictPointer.get(coord)['upDown']   #update last step
-                    # use while loop to update all past steps
-                    counter = 1
-                    while upNighbour in dictPointer.keys():
-                        dictPointer.get(upNighbour)['upDown'] = dictPointer.get(coord)['upDown']
-                        upNighbour = (coord[0]-1-counter,coord[1])
-                        counter +=1
-                if downNighbour in dictPointer.keys():
-
-                    dictPointer.get(coord)['upDown'] += dictPointer.get(downNighbour)['upDown']
-                    #dictPointer.get(downNighbour)['upDown'] = dictPointer.get(coord)['upDown']
-                    counter = 1
-                    while downNighbour in dictPointer.keys():
-                        dictPointer.get(downNighbour)['upDown'] = dictPointer.get(coord)['upDown']
-                        downNighbour = (coord[0]+1+counter,coord[1])
-                        counter +=1
-                #re-update upnighbor again!
-                upNighbour = (coord[0] - 1, coord[1])
-                counter = 1
-                while upNighbour in dictPointer.keys():
-                    dictPointer.get(upNighbour)['upDown'] = dictPointer.get(coord)['upDown']
-                    upNighbour = (coord[0] - 1 - counter, coord[1])
-                    counter += 1
-            if key == 'leftRight':
-                leftNighbour = (coord[0], coord[1] - 1)
-                rightNighbour = (coord[0], coord[1] + 1)
-                if leftNighbour in dictPointer.keys():
-                    dictPointer.get(coord)['leftRight'] += dictPointer.get(leftNighbour)['leftRight']
-                    counter = 1
-                    while leftNighbour in dictPointer.keys():
-                        dictPointer.get(leftNighbour)['leftRight'] = dictPointer.get(coord)['leftRight']
-                        leftNighbour = (coord[0], coord[1] - 1 - counter)
-                        counter += 1
-                if rightNighbour in dictPointer.keys():
-
-                    dictPointer.get(coord)['leftRight'] += dictPointer.get(rightNighbour)['leftRight']
-                    #dictPointer.get(downNighbour)['upDown'] = dictPointer.get(coord)['upDown']
-                    counter = 1
-                    while rightNighbour in dictPointer.keys():
-                        dictPointer.get(rightNighbour)['leftRight'] = dictPointer.get(coord)['leftRight']
-                        rightNighbour = (coord[0],coord[1] +1+counter)
-                        counter +=1
-                # re-update upnighbor again!
-                leftNighbour = (coord[0], coord[1] - 1)
-                counter = 1
-                while leftNighbour in dictPointer.keys():
-                    dictPointer.get(leftNighbour)['leftRight'] = dictPointer.get(coord)['leftRight']
-                    leftNighbour = (coord[0], coord[1]- 1 - counter)
-                    counter += 1
-            if key =="forwardslash":
-                leftDownNighbour = (coord[0]-1, coord[1] +1)
-                rightUpNighbour = (coord[0]+1, coord[1]-1)
-                if leftDownNighbour in dictPointer.keys():
-
-                    dictPointer.get(coord)['forwardslash'] += dictPointer.get(leftDownNighbour)['forwardslash']   #update the current step
-                    #dictPointer.get(upNighbour)['upDown'] = dictPointer.get(coord)['upDown']   #update last step
-                    # use while loop to update all past steps
-                    counter = 1
-                    while leftDownNighbour in dictPointer.keys():
-                        dictPointer.get(leftDownNighbour)['forwardslash'] = dictPointer.get(coord)['forwardslash']
-                        leftDownNighbour = (coord[0]-1-counter,coord[1] + 1 + counter)
-                        counter +=1
-                if rightUpNighbour in dictPointer.keys():
-
-                    dictPointer.get(coord)['forwardslash'] += dictPointer.get(rightUpNighbour)['forwardslash']
-                    #dictPointer.get(downNighbour)['upDown'] = dictPointer.get(coord)['upDown']
-                    counter = 1
-                    while rightUpNighbour in dictPointer.keys():
-                        dictPointer.get(rightUpNighbour)['forwardslash'] = dictPointer.get(coord)['forwardslash']
-                        rightUpNighbour = (coord[0]+1+counter,coord[1]-1-counter)
-                        counter +=1
-                # re-update upnighbor again!
-                leftDownNighbour = (coord[0]-1, coord[1] +1)
-                counter = 1
-                while leftDownNighbour in dictPointer.keys():
-                    dictPointer.get(leftDownNighbour)['forwardslash'] = dictPointer.get(coord)['forwardslash']
-                    leftDownNighbour = (coord[0] - 1 - counter, coord[1]+1 + counter)
-                    counter += 1
-            if key == 'backslash':
-                leftUpNighbour = (coord[0] - 1, coord[1] - 1)
-                rightDownNighbour = (coord[0] + 1, coord[1] + 1)
-                if leftUpNighbour in dictPointer.keys():
-
-                    dictPointer.get(coord)['backslash'] += dictPointer.get(leftUpNighbour)['backslash']   #update the current step
-                    #dictPointer.get(upNighbour)['upDown'] = dictPointer.get(coord)['upDown']   #update last step
-                    # use while loop to update all past steps
-                    counter = 1
-                    while leftUpNighbour in dictPointer.keys():
-                        dictPointer.get(leftUpNighbour)['backslash'] = dictPointer.get(coord)['backslash']
-                        leftUpNighbour = (coord[0]-1-counter,coord[1] - 1 - counter)
-                        counter +=1
-                if rightDownNighbour in dictPointer.keys():
-
-                    dictPointer.get(coord)['backslash'] += dictPointer.get(rightDownNighbour)['backslash']
-                    #dictPointer.get(downNighbour)['upDown'] = dictPointer.get(coord)['upDown']
-                    counter = 1
-                    while rightDownNighbour in dictPointer.keys():
-                        dictPointer.get(rightDownNighbour)['backslash'] = dictPointer.get(coord)['backslash']
-                        rightDownNighbour = (coord[0]+1+counter,coord[1]+1+counter)
-                        counter +=1
-                # re-update upnighbor again!
-                leftUpNighbour = (coord[0] - 1, coord[1] - 1)
-                counter = 1
-                while leftUpNighbour in dictPointer.keys():
-                    dictPointer.get(leftUpNighbour)['backslash'] = dictPointer.get(coord)['backslash']
-                    leftUpNighbour = (coord[0] - 1 - counter, coord[1] - 1 - counter)
-                    counter += 1
-            #print(key,value)
+    def updateLineLengths(self,board_color,move):
+        """
+        Record the stone of board_color ('b' or 'w') on point move and
+        update the length of the lines of stones through it.
+        self.lineLength[c, point, d] is the length of the line of color c
+        (0 black, 1 white) through point in direction d (up-down,
+        left-right, forward slash, backslash). Only the two endpoints of a
+        line are kept up to date, which is enough since a new stone can
+        only extend a line at its endpoints.
+        """
+        lengths = self.lineLength[0 if board_color == "b" else 1]
+        NS = self.board.NS
+        longest = 0
+        for d, step in enumerate((NS, 1, NS - 1, NS + 1)):
+            # neighbours on both sides are endpoints of their own lines,
+            # so the far ends are their lengths away from move
+            low = int(lengths[move - step, d])
+            high = int(lengths[move + step, d])
+            length = low + high + 1
+            lengths[move - low * step, d] = length
+            lengths[move + high * step, d] = length
+            if length > longest:
+                longest = length
 
         # -------------------------------------------------
         # Update the corrosponding max value for that color
         # Tell the program, if one side is win!!!
         # -------------------------------------------------
-        #print(self.colorMax.get(color.lower()))
-        for key, value in dictPointer.get(coord).items():
-            if value > self.colorMax.get(color.lower()):
-                 self.colorMax[color.lower()] = value
-        #print("max pointer is " + str(self.colorMax.get(color.lower())))
+        colorMax = self.colorMax
+        if longest > colorMax[board_color]:
+            colorMax[board_color] = longest
+            if longest >= 5:
+                self.game_over = True
 
 
     """
@@ -504,7 +414,7 @@ class GtpConnection():
 
     def list_commands_cmd(self, args):
         """ list all supported GTP commands """
-        self.respond(' '.join(list(self.commands.keys())))
+        self.respond(self._commands_str)
 
     """ Assignment 1: ignore this command, implement 
         gogui_rules_legal_moves_cmd  above instead """
@@ -515,11 +425,7 @@ class GtpConnection():
         board_color = args[0].lower()
         color = color_to_int(board_color)
         moves = GoBoardUtil.generate_legal_moves(self.board, color)
-        gtp_moves = []
-        for move in moves:
-            coords = point_to_coord(move,self.board.size)
-            gtp_moves.append(format_point(coords))
-        sorted_moves = ' '.join(sorted(gtp_moves))
+        sorted_moves = ' '.join(format_points(moves, self.board.size))
         self.respond(sorted_moves)
 
 
@@ -539,13 +445,26 @@ def format_point(move):
     """
     Return move coordinates as a string such as 'a1', or 'pass'.
     """
-    column_letters = "abcdefghjklmnopqrstuvwxyz"
     if move == PASS:
         return "pass"
     row, col = move
     if not 0 <= row < MAXSIZE or not 0 <= col < MAXSIZE:
         raise ValueError
-    return column_letters[col - 1]+ str(row) 
+    return _COLUMN_LETTERS[col - 1]+ str(row) 
+
+def format_points(points, boardsize):
+    """
+    Return a list of move strings such as 'a1' for board array indices,
+    formatted in one pass over a numpy array of the points.
+    The moves are ordered by column, then by row, comparing numbers
+    rather than strings so that e.g. 'a2' comes before 'a10'.
+    """
+    points = np.asarray(points, dtype = np.int32)
+    rows, cols = np.divmod(points, boardsize + 1)
+    order = np.lexsort((rows, cols))
+    rows, cols = rows[order], cols[order]
+    return np.char.add(_COLUMN_LETTER_ARRAY[cols - 1],
+                       rows.astype(str)).tolist()
     
 def move_to_coord(point_str, board_size):
     """
@@ -559,12 +478,9 @@ def move_to_coord(point_str, board_size):
     if s == "pass":
         return PASS
     try:
-        col_c = s[0]
-        if (not "a" <= col_c <= "z") or col_c == "i":
+        col = _COL_FROM_LETTER.get(s[0])
+        if col is None:
             raise ValueError
-        col = ord(col_c) - ord("a")
-        if col_c < "i":
-            col += 1
         row = int(s[1:])
         if row < 1:
             raise ValueError
@@ -576,6 +492,4 @@ def move_to_coord(point_str, board_size):
 
 def color_to_int(c):
     """convert character to the appropriate integer code"""
-    color_to_int = {"b": BLACK , "w": WHITE, "e": EMPTY, 
-                    "BORDER": BORDER}
-    return color_to_int[c] 
+    return _COLOR_TO_INT[c]
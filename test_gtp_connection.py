@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import io
+import unittest
+from unittest import mock
+from board_util import BLACK
+from simple_board import SimpleGoBoard
+from gtp_connection import GtpConnection, format_points
+from Go0 import Go0
+
+class GtpConnectionTestCase(unittest.TestCase):
+    """Tests for gtp_connection.py"""
+
+    def setUp(self):
+        # collect GTP responses instead of writing them to the terminal
+        patcher = mock.patch('gtp_connection.stdout', new_callable = io.StringIO)
+        self.out = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.con = GtpConnection(Go0(), SimpleGoBoard(7))
+
+    def send(self, command):
+        """ Run command and return its response """
+        self.out.seek(0)
+        self.out.truncate()
+        self.con.get_cmd(command)
+        return self.out.getvalue()
+
+    def play_line(self, color, moves):
+        """ Clear the board and play moves for color """
+        self.send("clear_board")
+        for move in moves:
+            self.assertEqual(self.send("play {} {}".format(color, move)),
+                             "= \n\n")
+
+    def do_test_five(self, color, moves):
+        """ The first four moves do not win, the fifth one does """
+        self.play_line(color, moves[:4])
+        self.assertEqual(self.con.colorMax[color], 4)
+        self.assertFalse(self.con.game_over)
+        self.send("play {} {}".format(color, moves[4]))
+        self.assertEqual(self.con.colorMax[color], 5)
+        self.assertTrue(self.con.game_over)
+
+    def test_five_up_down_at_border(self):
+        self.do_test_five('b', ["a1", "a2", "a3", "a4", "a5"])
+
+    def test_five_left_right_at_border(self):
+        self.do_test_five('w', ["g7", "f7", "e7", "d7", "c7"])
+
+    def test_five_backslash_from_corner(self):
+        self.do_test_five('b', ["a1", "b2", "c3", "d4", "e5"])
+
+    def test_five_forwardslash_from_corner(self):
+        self.do_test_five('w', ["g1", "f2", "e3", "d4", "c5"])
+
+    def do_test_join(self, color, moves):
+        """ The last move joins two lines of two into a five """
+        self.play_line(color, moves[:4])
+        self.assertEqual(self.con.colorMax[color], 2)
+        self.send("play {} {}".format(color, moves[4]))
+        self.assertEqual(self.con.colorMax[color], 5)
+        self.assertTrue(self.con.game_over)
+
+    def test_join_up_down(self):
+        self.do_test_join('b', ["c1", "c2", "c4", "c5", "c3"])
+
+    def test_join_left_right(self):
+        self.do_test_join('w', ["c7", "d7", "f7", "g7", "e7"])
+
+    def test_join_backslash(self):
+        self.do_test_join('w', ["b2", "c3", "e5", "f6", "d4"])
+
+    def test_join_forwardslash(self):
+        self.do_test_join('b', ["f2", "e3", "c5", "b6", "d4"])
+
+    def test_lines_do_not_wrap_across_border(self):
+        # g1 and a2 are neighbours in the 1-d board, separated by a border
+        self.play_line('b', ["e1", "f1", "g1", "a2", "b2"])
+        self.assertEqual(self.con.colorMax['b'], 3)
+        self.play_line('w', ["g1", "a3", "g3", "a5", "g5"])
+        self.assertEqual(self.con.colorMax['w'], 1)
+        self.assertFalse(self.con.game_over)
+
+    def test_lines_per_color(self):
+        self.play_line('b', ["a1", "a2"])
+        self.send("play w a3")
+        self.send("play b a4")
+        self.send("play b a5")
+        self.assertEqual(self.con.colorMax, {'b': 2, 'w': 1})
+
+    def test_play_after_win(self):
+        self.play_line('w', ["b1", "b2", "b3", "b4", "b5"])
+        self.assertEqual(self.send("gogui-rules_final_result"),
+                         "= white win\n\n")
+        self.assertEqual(self.send("play b c1"),
+                         "= One side is win game over!\n\n")
+        self.assertEqual(self.send("gogui-rules_legal_moves"), "= \n\n")
+
+    def test_format_points_order(self):
+        goboard = SimpleGoBoard(13)
+        points = [goboard.pt(10, 2), goboard.pt(2, 1), goboard.pt(13, 1),
+                  goboard.pt(1, 2), goboard.pt(9, 1), goboard.pt(1, 1)]
+        self.assertEqual(format_points(points, 13),
+                         ["a1", "a2", "a9", "a13", "b1", "b10"])
+
+    def test_format_points_empty(self):
+        self.assertEqual(format_points([], 13), [])
+
+    def test_legal_moves_size_13(self):
+        self.send("boardsize 13")
+        self.send("clear_board")
+        moves = self.send("gogui-rules_legal_moves").split()
+        self.assertEqual(len(moves), 1 + 13 * 13)
+        self.assertEqual(moves[:14], ["=", "A1", "A2", "A3", "A4", "A5",
+                                      "A6", "A7", "A8", "A9", "A10", "A11",
+                                      "A12", "A13"])
+        self.assertEqual(moves[-1], "N13")
+        self.assertEqual(self.send("legal_moves b").split()[9:12],
+                         ["a9", "a10", "a11"])
+
+    def test_legal_moves_full_board(self):
+        self.send("boardsize 2")
+        self.send("clear_board")
+        for move, color in zip(["a1", "a2", "b1", "b2"], "bwwb"):
+            self.send("play {} {}".format(color, move))
+        self.assertEqual(self.send("gogui-rules_legal_moves"), "= \n\n")
+        self.assertEqual(self.send("legal_moves b"), "= \n\n")
+        self.assertEqual(self.send("gogui-rules_final_result"), "= draw\n\n")
+
+    def test_boardsize_resizes_line_lengths(self):
+        self.send("clear_board")
+        self.assertEqual(self.send("boardsize 13"), "= \n\n")
+        self.assertEqual(self.send("play b m13"), "= \n\n")
+        goboard = self.con.board
+        self.assertEqual(goboard.board[goboard.pt(13, 12)], BLACK)
+        self.assertEqual(self.con.colorMax, {'b': 1, 'w': 0})
+
+    def test_boardsize_clears_win(self):
+        self.send("clear_board")
+        for col in "abcde":
+            self.send("play b {}1".format(col))
+        self.assertTrue(self.con.game_over)
+        self.send("boardsize 9")
+        self.assertFalse(self.con.game_over)
+        self.assertEqual(self.con.colorMax, {'b': 0, 'w': 0})
+        self.assertEqual(self.send("play w e5"), "= \n\n")
+
+    def test_play_before_clear_board(self):
+        self.assertEqual(self.send("play b a1"), "= \n\n")
+        self.assertEqual(self.con.colorMax, {'b': 1, 'w': 0})
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()